@@ -7,7 +7,8 @@ and provides audio narrations in professional or casual style.
 
 import asyncio
 import io
-import tempfile
+import threading
+import wave
 from typing import Optional, Tuple
 import gradio as gr
 from PIL import Image
@@ -16,6 +17,15 @@ from config import config
 from services.recognition import get_recognition_service
 from services.narration import get_narration_service
 from services.tts import get_tts_service
+from services.modelscope_client import get_modelscope_client
+from utils.api_utils import SingleFlight
+from utils.audio_utils import (
+    WavConcatenator,
+    create_temp_audio_file,
+    get_audio_temp_dir,
+    remove_temp_audio_file,
+)
+from utils.image_utils import preprocess_image_async, image_to_bytes_async
 
 
 # Style mapping
@@ -24,6 +34,202 @@ STYLE_MAP = {
     "趣解版": "casual"
 }
 
+# Uploads are downscaled to fit this size before recognition
+RECOGNITION_IMAGE_SIZE = (1024, 1024)
+
+# Sentences synthesized concurrently while narration streams
+TTS_SENTENCE_CONCURRENCY = 3
+
+# Service singletons, created once by init_services() at startup
+_recognition_service = None
+_narration_service = None
+_tts_service = None
+
+# Streamed narrations cannot be shared inside the services, so identical
+# requests in flight share the whole narration and audio pipeline instead
+_narration_inflight = SingleFlight()
+
+
+def init_services():
+    """Create the service singletons used by the request handlers."""
+    global _recognition_service, _narration_service, _tts_service
+    _recognition_service = get_recognition_service()
+    _narration_service = get_narration_service()
+    _tts_service = get_tts_service()
+
+
+# Background event loop shared by all requests, so pooled HTTP clients
+# keep their connections between clicks
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def start_event_loop():
+    """Start the shared event loop in a daemon thread."""
+    global _loop
+    _loop = asyncio.new_event_loop()
+    threading.Thread(
+        target=_loop.run_forever,
+        name="pipeline-loop",
+        daemon=True
+    ).start()
+
+
+def stop_event_loop():
+    """Close pooled clients and stop the shared event loop."""
+    asyncio.run_coroutine_threadsafe(
+        get_modelscope_client().aclose(), _loop
+    ).result()
+    if _tts_service is not None:
+        asyncio.run_coroutine_threadsafe(
+            _tts_service.aclose(), _loop
+        ).result()
+    _loop.call_soon_threadsafe(_loop.stop)
+
+
+async def synthesize_audio(
+    tts_service,
+    narration: str,
+    artwork: dict,
+    style: str
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Synthesize narration audio and return a playable path.
+
+    Returns:
+        Tuple of (audio_path, error_detail)
+    """
+    if artwork.get("id"):
+        tts_result = await tts_service.synthesize(
+            narration,
+            artwork["id"],
+            style
+        )
+        if not tts_result.get("success"):
+            return None, tts_result.get("error")
+        # Freshly synthesized audio is already on local disk
+        return (
+            tts_result.get("audio_path") or tts_result.get("audio_url"),
+            None
+        )
+
+    # For VLM results without database ID, stream direct audio to disk
+    loop = asyncio.get_running_loop()
+    with create_temp_audio_file() as f:
+        try:
+            async for chunk in tts_service.synthesize_stream(narration, style):
+                await loop.run_in_executor(None, f.write, chunk)
+            error_detail = None
+        except Exception as e:
+            error_detail = f"TTS error: {e}"
+        written = f.tell()
+    if written and not error_detail:
+        return f.name, None
+    # Drop empty or truncated audio
+    remove_temp_audio_file(f.name)
+    return None, error_detail
+
+
+async def narrate_cached(
+    narration_service,
+    tts_service,
+    artwork: dict,
+    style: str
+) -> Tuple[str, Optional[str], Optional[str]]:
+    """
+    Use the pre-written narration and synthesize it in one call.
+
+    Returns:
+        Tuple of (narration, audio_path, error_detail)
+    """
+    narration_result = await narration_service.generate_narration(
+        artwork, style
+    )
+    if not narration_result.get("success"):
+        error = narration_result.get("error", "")
+        return f"讲解生成失败: {error}", None, None
+    narration = narration_result.get("narration", "")
+    audio_path, error_detail = await synthesize_audio(
+        tts_service, narration, artwork, style
+    )
+    return narration, audio_path, error_detail
+
+
+async def narrate_streaming(
+    narration_service,
+    tts_service,
+    artwork: dict,
+    style: str
+) -> Tuple[str, Optional[str], Optional[str]]:
+    """
+    Generate narration with the LLM and synthesize it sentence by sentence.
+
+    Each sentence goes to TTS as soon as it is complete, so synthesis
+    overlaps with the rest of the generation. The clips are merged into
+    one WAV file in narration order.
+
+    Returns:
+        Tuple of (narration, audio_path, error_detail)
+    """
+    semaphore = asyncio.Semaphore(TTS_SENTENCE_CONCURRENCY)
+
+    async def synthesize_sentence(sentence: str) -> Optional[bytes]:
+        async with semaphore:
+            return await tts_service.synthesize_direct(sentence, style)
+
+    sentences = []
+    tts_tasks = []
+    try:
+        async for sentence in narration_service.stream_narration(
+            artwork, style
+        ):
+            sentences.append(sentence)
+            tts_tasks.append(
+                asyncio.create_task(synthesize_sentence(sentence))
+            )
+    except Exception as e:
+        for task in tts_tasks:
+            task.cancel()
+        return f"讲解生成失败: {e}", None, None
+
+    narration = "".join(sentences)
+    if not narration:
+        return narration, None, None
+
+    with create_temp_audio_file() as f:
+        audio_path = f.name
+    if await merge_sentence_audio(tts_tasks, audio_path):
+        return narration, audio_path, None
+
+    # Fall back to one synthesis call for the whole narration
+    remove_temp_audio_file(audio_path)
+    audio_path, error_detail = await synthesize_audio(
+        tts_service, narration, artwork, style
+    )
+    return narration, audio_path, error_detail
+
+
+async def merge_sentence_audio(tts_tasks: list, audio_path: str) -> bool:
+    """Write sentence clips to audio_path in order as each one finishes."""
+    loop = asyncio.get_running_loop()
+    concatenator = WavConcatenator(audio_path)
+    try:
+        for task in tts_tasks:
+            audio_data = await task
+            if not audio_data:
+                return False
+            await loop.run_in_executor(
+                None, concatenator.append, audio_data
+            )
+        return True
+    except (wave.Error, EOFError) as e:
+        # Malformed or truncated clips fall back to whole-narration TTS
+        print(f"Sentence audio merge error: {e}")
+        return False
+    finally:
+        for task in tts_tasks:
+            task.cancel()
+        concatenator.close()
+
 
 async def process_image_async(
     image: Optional[Image.Image],
@@ -44,13 +250,14 @@ async def process_image_async(
 
     style = STYLE_MAP.get(style_cn, "professional")
 
-    # Get services
-    recognition_service = get_recognition_service()
-    narration_service = get_narration_service()
-    tts_service = get_tts_service()
+    recognition_service = _recognition_service
+    narration_service = _narration_service
+    tts_service = _tts_service
 
-    # 1. Recognize artwork
-    recognition_result = await recognition_service.recognize(image)
+    # 1. Recognize artwork from a downscaled JPEG instead of the raw photo
+    image = await preprocess_image_async(image, max_size=RECOGNITION_IMAGE_SIZE)
+    image_bytes = await image_to_bytes_async(image)
+    recognition_result = await recognition_service.recognize(image_bytes)
 
     if not recognition_result.get("success"):
         error_msg = recognition_result.get("error", "识别失败，请重试")
@@ -58,13 +265,31 @@ async def process_image_async(
 
     artwork = recognition_result.get("artwork", {})
 
-    # 2. Extract artwork info
+    # 2. Start narration and audio right away
+    prewarm_task = None
+    if artwork.get(f"description_{style}"):
+        # Pre-written narration is already known, so TTS starts immediately
+        narration_task = asyncio.create_task(
+            narrate_cached(narration_service, tts_service, artwork, style)
+        )
+    else:
+        # Warm up TTS while the LLM writes the first sentence
+        prewarm_task = asyncio.create_task(tts_service.prewarm())
+        key = (artwork.get("id"), artwork.get("name_cn"), style)
+        narration_task = asyncio.create_task(_narration_inflight.run(
+            key,
+            lambda: narrate_streaming(
+                narration_service, tts_service, artwork, style
+            )
+        ))
+
+    # 3. Extract artwork info
     artwork_name = artwork.get("name_cn", "Unknown")
     artist = artwork.get("artist", "Unknown")
     year = artwork.get("year", "")
     artist_info = f"{artist} / {year}" if year else artist
 
-    # 3. Get hall info
+    # 4. Get hall info
     hall_info = ""
     if artwork.get("halls"):
         hall = artwork["halls"]
@@ -72,48 +297,13 @@ async def process_image_async(
     elif recognition_result.get("source") in {"vlm", "kimi"}:
         hall_info = "展厅信息暂无（识别结果）"
 
-    # 4. Generate narration
-    narration_result = await narration_service.generate_narration(artwork, style)
-    narration = ""
-    if narration_result.get("success"):
-        narration = narration_result.get("narration", "")
-    else:
-        narration = f"讲解生成失败: {narration_result.get('error', '')}"
-
-    # 5. Generate audio
-    audio_path = None
-    if narration and artwork.get("id"):
-        tts_result = await tts_service.synthesize(
-            narration,
-            artwork["id"],
-            style
-        )
-        if tts_result.get("success"):
-            audio_data = tts_result.get("audio_data")
-            if audio_data:
-                with tempfile.NamedTemporaryFile(
-                    suffix=".wav", delete=False
-                ) as f:
-                    f.write(audio_data)
-                    audio_path = f.name
-            else:
-                audio_url = tts_result.get("audio_url")
-                if audio_url:
-                    audio_path = audio_url
-        else:
-            error_detail = tts_result.get("error")
-            if error_detail:
-                narration = f"{narration}\n\n语音生成失败: {error_detail}"
-    elif narration:
-        # For VLM results without database ID, generate direct audio
-        audio_data = await tts_service.synthesize_direct(narration, style)
-        if audio_data:
-            # Save to temporary file
-            with tempfile.NamedTemporaryFile(
-                suffix=".wav", delete=False
-            ) as f:
-                f.write(audio_data)
-                audio_path = f.name
+    # 5. Wait for narration and audio
+    narration, audio_path, error_detail = await narration_task
+    # The warm-up only helps the first TTS call; never wait on it
+    if prewarm_task and not prewarm_task.done():
+        prewarm_task.cancel()
+    if error_detail:
+        narration = f"{narration}\n\n语音生成失败: {error_detail}"
 
     return (artwork_name, artist_info, hall_info, narration, audio_path)
 
@@ -122,8 +312,10 @@ def process_image(
     image: Optional[Image.Image],
     style_cn: str
 ) -> Tuple[str, str, str, str, Optional[str]]:
-    """Sync wrapper for async process_image_async."""
-    return asyncio.run(process_image_async(image, style_cn))
+    """Sync wrapper running process_image_async on the shared event loop."""
+    return asyncio.run_coroutine_threadsafe(
+        process_image_async(image, style_cn), _loop
+    ).result()
 
 
 def create_ui() -> gr.Blocks:
@@ -273,13 +465,21 @@ def main():
         print(f"Warning: Missing configuration: {', '.join(missing)}")
         print("Some features may not work properly.")
 
+    init_services()
+    start_event_loop()
+
     # Create and launch app
     app = create_ui()
-    app.launch(
-        server_name="0.0.0.0",
-        server_port=7860,
-        share=False
-    )
+    try:
+        app.launch(
+            server_name="0.0.0.0",
+            server_port=7860,
+            share=False,
+            # Expose only the private playback directory, not its parent
+            allowed_paths=[get_audio_temp_dir()]
+        )
+    finally:
+        stop_event_loop()
 
 
 if __name__ == "__main__":
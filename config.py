@@ -49,6 +49,8 @@ class Config:
 
     # Storage Settings
     AUDIO_BUCKET: str = os.getenv("AUDIO_BUCKET", "audio-cache")
+    # Public bucket for recognition uploads; images are sent inline when empty
+    RECOGNITION_IMAGE_BUCKET: str = os.getenv("RECOGNITION_IMAGE_BUCKET", "")
 
     @classmethod
     def validate(cls) -> list[str]:
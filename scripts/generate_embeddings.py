@@ -5,15 +5,22 @@ Run this after setting up the database and inserting artwork records.
 """
 
 import os
+import sys
 import asyncio
+from itertools import islice
 
-from supabase import create_client
 import httpx
+import numpy as np
+import orjson
 
 # Load environment variables
 from dotenv import load_dotenv
 load_dotenv()
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.supabase_client import get_supabase_client
+
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 MODELSCOPE_API_KEY = os.getenv("MODELSCOPE_API_KEY", os.getenv("DASHSCOPE_API_KEY", ""))
@@ -21,72 +28,99 @@ MODELSCOPE_API_BASE = os.getenv("MODELSCOPE_API_BASE", "https://api-inference.mo
 TEXT_EMBEDDING_MODEL = os.getenv("TEXT_EMBEDDING_MODEL", "Qwen/Qwen3-Embedding-4B")
 TEXT_EMBEDDING_DIM = int(os.getenv("TEXT_EMBEDDING_DIM", "1536"))
 
+# Artwork fields included in the embedding text, in order
+ARTWORK_TEXT_FIELDS = (
+    ("name_cn", "名称"),
+    ("name_en", "英文名"),
+    ("artist", "作者"),
+    ("year", "年代"),
+    ("style", "风格"),
+)
+
+# Texts per embeddings request and number of requests in flight
+BATCH_SIZE = 16
+MAX_CONCURRENCY = 4
+
+# UTF-8 bytes allowed per embedding input (roughly 8k tokens of CJK text)
+MAX_INPUT_BYTES = 24 * 1024
+
 
 def build_artwork_text(artwork: dict) -> str:
-    parts = []
-    name_cn = artwork.get("name_cn")
-    name_en = artwork.get("name_en")
-    artist = artwork.get("artist")
-    year = artwork.get("year")
-    style = artwork.get("style")
+    lines = [
+        f"{label}:{value}"
+        for key, label in ARTWORK_TEXT_FIELDS
+        if (value := artwork.get(key))
+    ]
     description = artwork.get("description_casual") or artwork.get("description_professional")
-
-    if name_cn:
-        parts.append(f"名称:{name_cn}")
-    if name_en:
-        parts.append(f"英文名:{name_en}")
-    if artist:
-        parts.append(f"作者:{artist}")
-    if year:
-        parts.append(f"年代:{year}")
-    if style:
-        parts.append(f"风格:{style}")
     if description:
-        parts.append(f"描述:{description}")
+        lines.append(f"描述:{description}")
 
-    return "\n".join(parts)
+    return "\n".join(lines)
 
 
-async def get_embedding_from_text(text: str) -> list:
-    """Get text embedding using ModelScope API."""
+def truncate_long_texts(texts: list[str]) -> list[str]:
+    """Truncate texts whose UTF-8 encoding exceeds MAX_INPUT_BYTES."""
+    encoded = [text.encode("utf-8") for text in texts]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    texts = list(texts)
+    for index in np.flatnonzero(lengths > MAX_INPUT_BYTES):
+        texts[index] = encoded[index][:MAX_INPUT_BYTES].decode(
+            "utf-8", errors="ignore"
+        )
+    return texts
+
+
+async def get_embeddings_batch(
+    client: httpx.AsyncClient,
+    texts: list[str]
+) -> list:
+    """Get text embeddings for a batch of texts, aligned by index."""
     headers = {
         "Authorization": f"Bearer {MODELSCOPE_API_KEY}",
         "Content-Type": "application/json"
     }
     payload = {
         "model": TEXT_EMBEDDING_MODEL,
-        "input": [text],
+        "input": texts,
         "encoding_format": "float",
         "dimensions": TEXT_EMBEDDING_DIM
     }
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        resp = await client.post(
-            f"{MODELSCOPE_API_BASE.rstrip('/')}/embeddings",
-            headers=headers,
-            json=payload
-        )
+    resp = await client.post(
+        f"{MODELSCOPE_API_BASE.rstrip('/')}/embeddings",
+        headers=headers,
+        content=orjson.dumps(payload)
+    )
+    results = [None] * len(texts)
     if resp.status_code == 200:
-        data = resp.json()
+        data = orjson.loads(resp.content)
         output = data.get("output") or data
         embeddings = output.get("embeddings") or output.get("data")
-        if isinstance(embeddings, list) and embeddings:
-            first = embeddings[0]
-            if isinstance(first, dict):
-                return first.get("embedding")
-            return first
+        if isinstance(embeddings, list):
+            for position, item in enumerate(embeddings[:len(texts)]):
+                if isinstance(item, dict):
+                    index = item.get("index", item.get("text_index", position))
+                    if 0 <= index < len(texts):
+                        results[index] = item.get("embedding")
+                else:
+                    results[position] = item
     else:
         try:
-            print(f"Error getting embedding: {resp.json()}")
+            print(f"Error getting embeddings: {resp.json()}")
         except Exception:
-            print(f"Error getting embedding: {resp.text}")
-    return None
+            print(f"Error getting embeddings: {resp.text}")
+    return results
+
+
+def batched(items: list, size: int):
+    """Yield successive chunks of at most size items."""
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
 
 
-def update_artwork_embedding(supabase, artwork_id: str, embedding: list):
-    """Update artwork record with embedding."""
-    response = supabase.table("artworks").update({
-        "embedding": embedding
-    }).eq("id", artwork_id).execute()
+def update_artwork_embeddings(supabase, rows: list[dict]):
+    """Upsert artwork records with their embeddings in one request."""
+    response = supabase.table("artworks").upsert(rows).execute()
 
     return response.data
 
@@ -98,8 +132,8 @@ async def main():
         print("Please set SUPABASE_URL, SUPABASE_KEY, and MODELSCOPE_API_KEY")
         return
 
-    # Initialize Supabase client
-    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+    # Shared Supabase client keeps one pooled connection for all calls
+    supabase = get_supabase_client().client
 
     # Get all artworks without embeddings
     response = supabase.table("artworks").select(
@@ -109,21 +143,59 @@ async def main():
     artworks = response.data
     print(f"Found {len(artworks)} artworks without embeddings")
 
-    for artwork in artworks:
-        print(f"Processing: {artwork['name_cn']}")
-
-        embedding_text = build_artwork_text(artwork)
+    texts = truncate_long_texts(
+        [build_artwork_text(artwork) for artwork in artworks]
+    )
+    pending = []
+    for artwork, embedding_text in zip(artworks, texts):
         if not embedding_text.strip():
-            print(f"  Skipping - no metadata")
+            print(f"Skipping {artwork['name_cn']} - no metadata")
             continue
+        pending.append((artwork, embedding_text))
 
-        embedding = await get_embedding_from_text(embedding_text)
+    # Identical texts only need to be embedded once
+    unique_texts = list(dict.fromkeys(text for _, text in pending))
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
 
+    async def embed_batch(client: httpx.AsyncClient, batch: list[str]) -> dict:
+        # A failed batch only loses its own texts, not the whole run
+        try:
+            async with semaphore:
+                embeddings = await get_embeddings_batch(client, batch)
+        except Exception as e:
+            print(f"Embedding batch failed ({len(batch)} texts): {e}")
+            return {}
+        return dict(zip(batch, embeddings))
+
+    # Reuse one connection for all embedding requests
+    async with httpx.AsyncClient(timeout=60.0, http2=True) as client:
+        results = await asyncio.gather(*(
+            embed_batch(client, batch)
+            for batch in batched(unique_texts, BATCH_SIZE)
+        ))
+    embeddings = {}
+    for result in results:
+        embeddings.update(result)
+
+    rows = []
+    for artwork, embedding_text in pending:
+        embedding = embeddings.get(embedding_text)
         if embedding:
-            update_artwork_embedding(supabase, artwork["id"], embedding)
-            print(f"  Updated embedding ({len(embedding)} dimensions)")
+            # Upsert needs the NOT NULL columns alongside the embedding;
+            # other columns are left out so concurrent edits survive
+            rows.append({
+                "id": artwork["id"],
+                "name_cn": artwork["name_cn"],
+                "artist": artwork["artist"],
+                "embedding": embedding
+            })
+            print(f"Processed: {artwork['name_cn']} ({len(embedding)} dimensions)")
         else:
-            print(f"  Failed to get embedding")
+            print(f"Failed to get embedding: {artwork['name_cn']}")
+
+    if rows:
+        update_artwork_embeddings(supabase, rows)
+        print(f"Updated {len(rows)} embeddings")
 
     print("Done!")
 
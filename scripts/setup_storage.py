@@ -1,44 +1,67 @@
 #!/usr/bin/env python3
 """
 Storage setup script for Supabase.
-Creates the audio-cache bucket for storing TTS audio files.
+Creates the audio-cache bucket for storing TTS audio files, and the
+optional bucket for recognition images.
 """
 
 import os
+import sys
 from dotenv import load_dotenv
-from supabase import create_client
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.supabase_client import get_supabase_client
 
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 BUCKET_NAME = os.getenv("AUDIO_BUCKET", "audio-cache")
+IMAGE_BUCKET_NAME = os.getenv("RECOGNITION_IMAGE_BUCKET", "")
+
+
+def create_bucket(supabase, name: str, options: dict):
+    """Create a storage bucket, tolerating one that already exists."""
+    try:
+        supabase.storage.create_bucket(name, options=options)
+        print(f"Created bucket: {name}")
+    except Exception as e:
+        if "already exists" in str(e).lower():
+            print(f"Bucket {name} already exists")
+        else:
+            print(f"Error creating bucket: {e}")
 
 
 def setup_storage():
-    """Create audio cache bucket in Supabase Storage."""
+    """Create audio cache and recognition image buckets in Supabase Storage."""
     if not all([SUPABASE_URL, SUPABASE_KEY]):
         print("Error: Missing SUPABASE_URL or SUPABASE_KEY")
         return
 
-    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+    supabase = get_supabase_client().client
 
-    try:
-        # Create bucket
-        supabase.storage.create_bucket(
-            BUCKET_NAME,
-            options={
+    create_bucket(
+        supabase,
+        BUCKET_NAME,
+        {
+            "public": True,
+            "file_size_limit": 10485760,  # 10MB
+            "allowed_mime_types": ["audio/wav", "audio/mpeg", "audio/mp3"]
+        }
+    )
+
+    # Optional bucket for recognition images passed to the VLMs by URL
+    if IMAGE_BUCKET_NAME:
+        create_bucket(
+            supabase,
+            IMAGE_BUCKET_NAME,
+            {
                 "public": True,
-                "file_size_limit": 10485760,  # 10MB
-                "allowed_mime_types": ["audio/wav", "audio/mpeg", "audio/mp3"]
+                "file_size_limit": 5242880,  # 5MB
+                "allowed_mime_types": ["image/jpeg"]
             }
         )
-        print(f"Created bucket: {BUCKET_NAME}")
-    except Exception as e:
-        if "already exists" in str(e).lower():
-            print(f"Bucket {BUCKET_NAME} already exists")
-        else:
-            print(f"Error creating bucket: {e}")
 
 
 if __name__ == "__main__":
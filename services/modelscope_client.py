@@ -2,8 +2,11 @@
 ModelScope API client wrapper.
 """
 
-from typing import Any, Optional
+import asyncio
+from typing import Any, AsyncIterator, Optional
 import httpx
+import numpy as np
+import orjson
 
 from config import config
 
@@ -15,6 +18,33 @@ class ModelScopeClient:
         self.api_key = config.MODELSCOPE_API_KEY
         self.base_url = config.MODELSCOPE_API_BASE.rstrip("/")
         self.timeout = httpx.Timeout(60.0)
+        self.limits = httpx.Limits(
+            max_keepalive_connections=32,
+            max_connections=64
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the pooled HTTP/2 client bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                http2=True,
+                limits=self.limits
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def aclose(self):
+        """Close the pooled HTTP client."""
+        client, loop = self._client, self._client_loop
+        self._client = None
+        self._client_loop = None
+        # Connections opened on an already closed loop cannot be shut down
+        if client is not None and loop is asyncio.get_running_loop():
+            await client.aclose()
 
     def _headers(self) -> dict:
         return {
@@ -23,14 +53,13 @@ class ModelScopeClient:
         }
 
     async def _post_json(self, path: str, payload: dict) -> tuple[int, Any]:
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                f"{self.base_url}{path}",
-                headers=self._headers(),
-                json=payload
-            )
+        response = await self._get_client().post(
+            f"{self.base_url}{path}",
+            headers=self._headers(),
+            content=orjson.dumps(payload)
+        )
         try:
-            data = response.json()
+            data = orjson.loads(response.content)
         except Exception:
             data = {"error": response.text}
         return response.status_code, data
@@ -59,12 +88,52 @@ class ModelScopeClient:
             "data": data
         }
 
+    async def chat_completions_stream(
+        self,
+        model: str,
+        messages: list[dict],
+        temperature: float = 0.7,
+        max_tokens: int = 512,
+        enable_thinking: bool = False
+    ) -> AsyncIterator[str]:
+        """Stream chat completion content deltas from server-sent events."""
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "enable_thinking": enable_thinking,
+            "stream": True
+        }
+        async with self._get_client().stream(
+            "POST",
+            f"{self.base_url}/chat/completions",
+            headers=self._headers(),
+            content=orjson.dumps(payload)
+        ) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                raise RuntimeError(
+                    f"LLM call failed ({response.status_code}): {response.text}"
+                )
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                choices = orjson.loads(data).get("choices") or []
+                if choices:
+                    content = (choices[0].get("delta") or {}).get("content")
+                    if content:
+                        yield content
+
     async def embeddings(
         self,
         model: str,
         inputs: list[Any],
         dimensions: Optional[int] = None
-    ) -> Optional[list]:
+    ) -> Optional[np.ndarray]:
         payload = {
             "model": model,
             "input": inputs,
@@ -75,6 +144,45 @@ class ModelScopeClient:
         status_code, data = await self._post_json("/embeddings", payload)
         if status_code >= 400:
             return None
+        embedding = self._first_embedding(data)
+        if not embedding:
+            return None
+        return np.asarray(embedding, dtype=np.float32)
+
+    async def embeddings_batch(
+        self,
+        model: str,
+        inputs: list[Any],
+        dimensions: Optional[int] = None
+    ) -> list[Optional[np.ndarray]]:
+        """Embed several inputs in one call, aligned with inputs by index."""
+        payload = {
+            "model": model,
+            "input": inputs,
+            "encoding_format": "float"
+        }
+        if dimensions:
+            payload["dimensions"] = dimensions
+        results: list[Optional[np.ndarray]] = [None] * len(inputs)
+        status_code, data = await self._post_json("/embeddings", payload)
+        if status_code >= 400 or not isinstance(data, dict):
+            return results
+        output = data.get("output")
+        if not isinstance(output, dict):
+            output = data
+        items = output.get("embeddings") or output.get("data")
+        if not isinstance(items, list):
+            return results
+        for position, item in enumerate(items[:len(inputs)]):
+            if isinstance(item, dict) and item.get("embedding"):
+                index = item.get("index", item.get("text_index", position))
+                if 0 <= index < len(inputs):
+                    results[index] = np.asarray(
+                        item["embedding"], dtype=np.float32
+                    )
+        return results
+
+    def _first_embedding(self, data: Any) -> Optional[list]:
         if isinstance(data, dict):
             if "data" in data and data["data"]:
                 return data["data"][0].get("embedding")
@@ -93,7 +201,7 @@ class ModelScopeClient:
         model: str,
         text: str,
         voice: Optional[str] = None,
-        response_format: str = "wav"
+        response_format: str = "mp3"
     ) -> Optional[bytes]:
         payload = {
             "model": model,
@@ -102,12 +210,11 @@ class ModelScopeClient:
         }
         if voice:
             payload["voice"] = voice
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                f"{self.base_url}/audio/speech",
-                headers=self._headers(),
-                json=payload
-            )
+        response = await self._get_client().post(
+            f"{self.base_url}/audio/speech",
+            headers=self._headers(),
+            content=orjson.dumps(payload)
+        )
         if response.status_code >= 400:
             return None
         return response.content
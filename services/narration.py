@@ -4,9 +4,11 @@ Generates professional and casual style narrations for artworks.
 """
 
 import os
-from typing import Optional
+from string import Formatter
+from typing import AsyncIterator, Callable, Optional
 from config import config
 from .modelscope_client import get_modelscope_client
+from utils.api_utils import SingleFlight
 
 
 # Load prompt templates
@@ -23,24 +25,8 @@ def load_prompt(filename: str) -> str:
         return ""
 
 
-class NarrationService:
-    """Service for generating artwork narrations."""
-
-    STYLES = {
-        "professional": {
-            "prompt_file": "professional.txt",
-            "max_length": 300,
-            "voice": "zhichu"
-        },
-        "casual": {
-            "prompt_file": "casual.txt",
-            "max_length": 200,
-            "voice": "zhibei"
-        }
-    }
-
-    # Default prompts as fallback
-    DEFAULT_PROFESSIONAL_PROMPT = """你是一位资深的艺术史专家和博物馆讲解员。请为以下艺术品撰写专业讲解词。
+# Default prompts as fallback
+DEFAULT_PROFESSIONAL_PROMPT = """你是一位资深的艺术史专家和博物馆讲解员。请为以下艺术品撰写专业讲解词。
 
 艺术品信息：
 - 名称：{name}
@@ -54,7 +40,7 @@ class NarrationService:
 3. 使用专业但易懂的语言
 4. 可适当引用艺术评论家的评价"""
 
-    DEFAULT_CASUAL_PROMPT = """你是一位幽默风趣的博物馆导游，擅长用轻松有趣的方式讲述艺术品背后的故事。
+DEFAULT_CASUAL_PROMPT = """你是一位幽默风趣的博物馆导游，擅长用轻松有趣的方式讲述艺术品背后的故事。
 
 艺术品信息：
 - 名称：{name}
@@ -67,26 +53,106 @@ class NarrationService:
 3. 使用第一人称，仿佛艺术品在自我介绍
 4. 语言活泼，适合年轻观众"""
 
-    def __init__(self):
-        """Initialize narration service."""
-        self._load_prompts()
-        self.modelscope = get_modelscope_client()
+# Appended to the prompt when the artwork has a short description
+DESCRIPTION_PREFIX = "\n\n补充信息：\n- 简述："
+
+
+def compile_prompt(template: str) -> Callable[[dict], str]:
+    """
+    Pre-parse a prompt template into a substitution function.
+
+    Templates with plain {field} placeholders are split into literal and
+    field segments once; anything fancier falls back to str.format_map.
+    """
+    segments = []
+    for literal, field, spec, conversion in Formatter().parse(template):
+        if field is not None and (
+            spec or conversion or not field.isidentifier()
+        ):
+            return template.format_map
+        segments.append((literal, field))
+
+    def render(fields: dict) -> str:
+        return "".join(
+            literal if field is None else f"{literal}{fields[field]}"
+            for literal, field in segments
+        )
 
-    def _load_prompts(self):
-        """Load prompt templates from files."""
-        self.prompts = {}
+    return render
+
+
+# Narration is handed to TTS one sentence at a time while it streams
+SENTENCE_ENDINGS = "。！？!?\n"
+SENTENCE_CLOSERS = "”’\"'）)」』"
+MIN_SENTENCE_LENGTH = 10
+
+
+def split_sentences(text: str) -> tuple[list[str], str]:
+    """
+    Split complete sentences off the front of a text.
+
+    Sentences shorter than MIN_SENTENCE_LENGTH are merged with the next
+    one so TTS is not called for tiny fragments.
+
+    Returns:
+        Tuple of (sentences, unfinished remainder)
+    """
+    sentences = []
+    start = 0
+    index = 0
+    while index < len(text):
+        if text[index] in SENTENCE_ENDINGS:
+            end = index + 1
+            while end < len(text) and text[end] in SENTENCE_CLOSERS:
+                end += 1
+            sentence = text[start:end].strip()
+            if len(sentence) >= MIN_SENTENCE_LENGTH:
+                sentences.append(sentence)
+                start = end
+            index = end
+        else:
+            index += 1
+    return sentences, text[start:]
+
+
+# Prompts are static, so read them once at import time
+PROMPTS = {
+    "professional": (
+        load_prompt("professional.txt") or DEFAULT_PROFESSIONAL_PROMPT
+    ),
+    "casual": load_prompt("casual.txt") or DEFAULT_CASUAL_PROMPT
+}
+PROMPT_FORMATTERS = {
+    style: compile_prompt(template) for style, template in PROMPTS.items()
+}
 
-        # Try to load from files first
-        professional = load_prompt("professional.txt")
-        casual = load_prompt("casual.txt")
 
-        # Use defaults if files not found
-        self.prompts["professional"] = (
-            professional if professional else self.DEFAULT_PROFESSIONAL_PROMPT
-        )
-        self.prompts["casual"] = (
-            casual if casual else self.DEFAULT_CASUAL_PROMPT
-        )
+class NarrationService:
+    """Service for generating artwork narrations."""
+
+    # max_tokens allows ~1 token per Chinese character plus headroom for
+    # punctuation, so decoding stops close to the requested length
+    STYLES = {
+        "professional": {
+            "prompt_file": "professional.txt",
+            "max_length": 300,
+            "max_tokens": 400,
+            "voice": "zhichu"
+        },
+        "casual": {
+            "prompt_file": "casual.txt",
+            "max_length": 200,
+            "max_tokens": 280,
+            "voice": "zhibei"
+        }
+    }
+
+    def __init__(self):
+        """Initialize narration service."""
+        self.prompts = dict(PROMPTS)
+        self._formatters = dict(PROMPT_FORMATTERS)
+        self.modelscope = get_modelscope_client()
+        self._inflight = SingleFlight()
 
     async def generate_narration(
         self,
@@ -118,8 +184,82 @@ class NarrationService:
                 "narration": artwork[narration_key]
             }
 
-        # Generate new narration
-        return await self._generate_with_llm(artwork, style)
+        # Generate new narration; identical requests in flight share one call
+        key = (
+            artwork.get("id"),
+            artwork.get("name_cn"),
+            artwork.get("artist"),
+            style
+        )
+        return await self._inflight.run(
+            key, lambda: self._generate_with_llm(artwork, style)
+        )
+
+    async def stream_narration(
+        self,
+        artwork: dict,
+        style: str = "professional"
+    ) -> AsyncIterator[str]:
+        """
+        Stream narration for an artwork sentence by sentence.
+
+        Args:
+            artwork: Artwork dictionary with name_cn, artist, year, style
+            style: "professional" or "casual"
+
+        Yields:
+            Narration sentences as soon as they are complete
+
+        Raises:
+            ValueError: If the style is unknown
+            RuntimeError: If the LLM call fails
+        """
+        if style not in self.STYLES:
+            raise ValueError(f"Unknown style: {style}")
+
+        # Pre-written narration needs no LLM call
+        narration = artwork.get(f"description_{style}")
+        if narration:
+            sentences, rest = split_sentences(narration)
+            for sentence in sentences:
+                yield sentence
+            if rest.strip():
+                yield rest.strip()
+            return
+
+        buffer = ""
+        async for delta in self.modelscope.chat_completions_stream(
+            model=config.NARRATION_MODEL,
+            messages=[{
+                "role": "user",
+                "content": self._build_prompt(artwork, style)
+            }],
+            max_tokens=self.STYLES[style]["max_tokens"],
+            temperature=0.7,
+            enable_thinking=False
+        ):
+            sentences, buffer = split_sentences(buffer + delta)
+            for sentence in sentences:
+                yield sentence
+        if buffer.strip():
+            yield buffer.strip()
+
+    def _build_prompt(self, artwork: dict, style: str) -> str:
+        """Format the style prompt with artwork info."""
+        prompt = self._formatters[style]({
+            "name": artwork.get("name_cn", "Unknown"),
+            "artist": artwork.get("artist", "Unknown"),
+            "year": artwork.get("year", "Unknown"),
+            "style": artwork.get("style", "Unknown")
+        })
+        description = (
+            artwork.get("description_casual")
+            or artwork.get("description_professional")
+            or ""
+        ).strip()
+        if description:
+            prompt = prompt + DESCRIPTION_PREFIX + description
+        return prompt
 
     async def _generate_with_llm(
         self,
@@ -128,26 +268,12 @@ class NarrationService:
     ) -> dict:
         """Generate narration using LLM."""
         try:
-            # Format prompt with artwork info
-            prompt_template = self.prompts[style]
-            prompt = prompt_template.format(
-                name=artwork.get("name_cn", "Unknown"),
-                artist=artwork.get("artist", "Unknown"),
-                year=artwork.get("year", "Unknown"),
-                style=artwork.get("style", "Unknown")
-            )
-            description = (
-                artwork.get("description_casual")
-                or artwork.get("description_professional")
-                or ""
-            ).strip()
-            if description:
-                prompt = f"{prompt}\n\n补充信息：\n- 简述：{description}"
+            prompt = self._build_prompt(artwork, style)
 
             response = await self.modelscope.chat_completions(
                 model=config.NARRATION_MODEL,
                 messages=[{"role": "user", "content": prompt}],
-                max_tokens=500,
+                max_tokens=self.STYLES[style]["max_tokens"],
                 temperature=0.7,
                 enable_thinking=False
             )
@@ -2,78 +2,103 @@
 Artwork recognition service using VLM + Text Embedding vector search.
 """
 
-from typing import Optional
-import json
-import re
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Optional, Union
+import numpy as np
+import orjson
 from PIL import Image
 
 from config import config
 from .supabase_client import get_supabase_client
 from .modelscope_client import get_modelscope_client
-from utils.image_utils import encode_image_base64
+from utils.api_utils import MicroBatcher, SingleFlight, async_ttl_cache
+from utils.image_utils import encode_image_base64_async
+
+# Prompt shared by the VLM and Kimi recognition calls
+RECOGNITION_PROMPT = """请分析这张艺术品图片，并以JSON格式返回以下信息：
+{
+    "name_cn": "艺术品中文名称",
+    "name_en": "艺术品英文名称（如果知道）",
+    "artist": "作者",
+    "year": "创作年代（如：1503-1519）",
+    "style": "艺术流派（如：文艺复兴、印象派等）",
+    "description": "简短描述（50字以内）"
+}
+
+如果无法识别为艺术品，请返回：
+{"error": "无法识别为艺术品"}
+
+只返回JSON，不要其他内容。"""
+
+# Placeholder answers treated as missing, compared casefolded
+UNKNOWN_VALUES = frozenset({"", "unknown", "未知", "不详", "none", "null"})
+
+# The text part of the message never changes, so it is built once
+RECOGNITION_PROMPT_CONTENT = {"type": "text", "text": RECOGNITION_PROMPT}
 
 
 class ArtworkRecognitionService:
     """Service for recognizing artworks from images."""
 
+    # Uploaded recognition images whose public URL is remembered in process
+    IMAGE_URL_CACHE_SIZE = 256
+
     def __init__(self):
         """Initialize recognition service."""
         self.supabase = get_supabase_client()
         self.similarity_threshold = config.SIMILARITY_THRESHOLD
         self.modelscope = get_modelscope_client()
+        self._inflight = SingleFlight()
+        self._image_url_cache: OrderedDict[str, str] = OrderedDict()
+        # Concurrent recognitions share embedding calls
+        self._embedding_batcher = MicroBatcher(
+            self._embed_texts, max_batch_size=32, max_wait=0.01
+        )
 
-    async def recognize(self, image: Image.Image) -> dict:
+    async def recognize(self, image: Union[Image.Image, bytes]) -> dict:
         """
         Main recognition entry point.
         Uses VLM extraction + text embedding vector search.
 
         Args:
-            image: PIL Image object
+            image: PIL Image object or JPEG bytes
 
         Returns:
             dict with artwork info or error message
         """
+        if isinstance(image, bytes):
+            # Identical uploads in flight share one recognition
+            key = hashlib.blake2b(image, digest_size=16).digest()
+            return await self._inflight.run(
+                key, lambda: self._recognize(image)
+            )
+        return await self._recognize(image)
+
+    async def _recognize(self, image: Union[Image.Image, bytes]) -> dict:
+        """Run VLM recognition with Kimi fallback."""
         try:
-            vlm_result = await self._vlm_recognition(image)
-            result = vlm_result
-            if not vlm_result.get("success"):
-                kimi_result = await self._kimi_recognition(image)
-                if kimi_result.get("success"):
-                    result = kimi_result
-                elif kimi_result.get("error"):
-                    result = kimi_result
-            else:
-                artwork = vlm_result.get("artwork", {})
-                if self._is_insufficient_artwork(artwork):
-                    kimi_result = await self._kimi_recognition(image)
-                    if kimi_result.get("success"):
-                        result = kimi_result
+            result = await self._recognize_artwork(image)
 
             if not result.get("success"):
                 return result
 
             embedding_text = self._build_embedding_text(result["artwork"])
-            embedding = await self._extract_text_embedding(embedding_text)
-
-            if embedding:
-                results = await self.supabase.search_artwork_by_vector(
-                    embedding,
-                    threshold=self.similarity_threshold,
-                    limit=1
-                )
+            try:
+                match = await self._match_artwork(embedding_text)
+            except LookupError:
+                match = None
 
-                if results and len(results) > 0:
-                    artwork = results[0]
-                    full_info = await self.supabase.get_artwork_with_hall(
-                        artwork["id"]
-                    )
-                    if full_info:
-                        return {
-                            "success": True,
-                            "source": "vector_search",
-                            "similarity": artwork.get("similarity", 0),
-                            "artwork": full_info
-                        }
+            if match:
+                # Copy so the cached match is left untouched
+                artwork = dict(match)
+                return {
+                    "success": True,
+                    "source": "vector_search",
+                    "similarity": artwork.pop("similarity", 0),
+                    "artwork": artwork
+                }
 
             return result
 
@@ -83,7 +108,76 @@ class ArtworkRecognitionService:
                 "error": f"Recognition failed: {str(e)}"
             }
 
-    async def _extract_text_embedding(self, text: str) -> Optional[list]:
+    async def _recognize_artwork(
+        self,
+        image: Union[Image.Image, bytes]
+    ) -> dict:
+        """
+        Run VLM and Kimi recognition concurrently and pick one result.
+
+        The first sufficient answer wins and the other call is cancelled.
+        Otherwise the VLM result is preferred unless Kimi did better.
+
+        Args:
+            image: PIL Image object or JPEG bytes
+
+        Returns:
+            dict with recognition results
+        """
+        # Both models get the same payload, so the image is encoded once
+        messages = self._build_messages(await self._image_url(image))
+        vlm_task = asyncio.create_task(self._vlm_recognition(messages))
+        kimi_task = asyncio.create_task(self._kimi_recognition(messages))
+        try:
+            done, _ = await asyncio.wait(
+                {vlm_task, kimi_task},
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in (vlm_task, kimi_task):
+                if task in done and self._is_sufficient_result(task.result()):
+                    return task.result()
+
+            vlm_result, kimi_result = await asyncio.gather(vlm_task, kimi_task)
+            if vlm_result.get("success"):
+                if kimi_result.get("success") and self._is_insufficient_artwork(
+                    vlm_result.get("artwork", {})
+                ):
+                    return kimi_result
+                return vlm_result
+            if kimi_result.get("success") or kimi_result.get("error"):
+                return kimi_result
+            return vlm_result
+        finally:
+            vlm_task.cancel()
+            kimi_task.cancel()
+
+    @async_ttl_cache(maxsize=1024, ttl=300)
+    async def _match_artwork(self, embedding_text: str) -> Optional[dict]:
+        """
+        Find the catalog artwork for recognized text.
+
+        Repeat recognitions of the same artwork produce the same text, so
+        results are cached to skip both the embedding call and the RPC.
+
+        Args:
+            embedding_text: Text built by _build_embedding_text
+
+        Returns:
+            Matched artwork with hall and similarity, or None
+
+        Raises:
+            LookupError: If the embedding could not be extracted; raised
+                rather than returned so the failure is not cached
+        """
+        embedding = await self._extract_text_embedding(embedding_text)
+        if embedding is None:
+            raise LookupError("Embedding extraction failed")
+        return await self.supabase.match_artwork_with_hall(
+            embedding,
+            threshold=self.similarity_threshold
+        )
+
+    async def _extract_text_embedding(self, text: str) -> Optional[np.ndarray]:
         """
         Extract text embedding using ModelScope API.
 
@@ -91,43 +185,88 @@ class ArtworkRecognitionService:
             text: Text to embed
 
         Returns:
-            List of floats (embedding vector) or None
+            float32 embedding vector or None
         """
         try:
-            embedding = await self.modelscope.embeddings(
-                model=config.TEXT_EMBEDDING_MODEL,
-                inputs=[text],
-                dimensions=config.TEXT_EMBEDDING_DIM
-            )
-            return embedding
+            return await self._embedding_batcher.submit(text)
 
         except Exception as e:
             print(f"Embedding extraction error: {e}")
             return None
 
+    async def _embed_texts(self, texts: list[str]) -> list[Optional[np.ndarray]]:
+        """Embed a batch of texts in one ModelScope call."""
+        return await self.modelscope.embeddings_batch(
+            model=config.TEXT_EMBEDDING_MODEL,
+            inputs=texts,
+            dimensions=config.TEXT_EMBEDDING_DIM
+        )
+
     def _build_embedding_text(self, artwork: dict) -> str:
-        parts = []
-        name_cn = artwork.get("name_cn")
-        name_en = artwork.get("name_en")
-        artist = artwork.get("artist")
-        year = artwork.get("year")
-        style = artwork.get("style")
-        description = artwork.get("description_casual") or artwork.get("description_professional")
-
-        if name_cn:
-            parts.append(f"名称:{name_cn}")
-        if name_en:
-            parts.append(f"英文名:{name_en}")
-        if artist:
-            parts.append(f"作者:{artist}")
-        if year:
-            parts.append(f"年代:{year}")
-        if style:
-            parts.append(f"风格:{style}")
-        if description:
-            parts.append(f"描述:{description}")
-
-        return "\n".join(parts)
+        fields = (
+            ("名称", artwork.get("name_cn")),
+            ("英文名", artwork.get("name_en")),
+            ("作者", artwork.get("artist")),
+            ("年代", artwork.get("year")),
+            ("风格", artwork.get("style")),
+            ("描述", artwork.get("description_casual") or artwork.get("description_professional")),
+        )
+        return "\n".join(f"{label}:{value}" for label, value in fields if value)
+
+    async def _image_url(self, image: Union[Image.Image, bytes]) -> str:
+        """
+        Get the image URL sent to the recognition models.
+
+        JPEG bytes are uploaded to RECOGNITION_IMAGE_BUCKET when it is
+        configured, once per process for each distinct image; otherwise,
+        or if the upload fails, the image is inlined as a base64 data URL.
+
+        Args:
+            image: PIL Image object or JPEG bytes
+
+        Returns:
+            Public URL or data URL of the image
+        """
+        if config.RECOGNITION_IMAGE_BUCKET and isinstance(image, bytes):
+            key = hashlib.blake2b(image, digest_size=16).hexdigest()
+            image_url = self._image_url_cache.get(key)
+            if image_url:
+                # Already uploaded, so skip the upload round trip
+                self._image_url_cache.move_to_end(key)
+                return image_url
+            try:
+                image_url = await self.supabase.upload_recognition_image(
+                    f"{key}.jpg", image
+                )
+            except Exception as e:
+                print(f"Recognition image upload error: {e}")
+            else:
+                self._image_url_cache[key] = image_url
+                while len(self._image_url_cache) > self.IMAGE_URL_CACHE_SIZE:
+                    self._image_url_cache.popitem(last=False)
+                return image_url
+        image_base64 = await encode_image_base64_async(image)
+        return f"data:image/jpeg;base64,{image_base64}"
+
+    def _build_messages(self, image_url: str) -> list:
+        """Build the recognition chat messages for an image URL."""
+        return [{
+            "role": "user",
+            "content": [
+                {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": image_url
+                    }
+                },
+                RECOGNITION_PROMPT_CONTENT
+            ]
+        }]
+
+    def _is_sufficient_result(self, result: dict) -> bool:
+        return bool(result.get("success")) and not self._is_insufficient_artwork(
+            result.get("artwork", {})
+        )
 
     def _is_insufficient_artwork(self, artwork: dict) -> bool:
         name = (artwork.get("name_cn") or "").strip()
@@ -138,86 +277,55 @@ class ArtworkRecognitionService:
             or ""
         ).strip()
 
-        unknown_values = {"", "unknown", "未知", "不详", "none", "null"}
-        name_unknown = name.lower() in unknown_values
-        artist_unknown = artist.lower() in unknown_values
+        name_unknown = name.casefold() in UNKNOWN_VALUES
+        artist_unknown = artist.casefold() in UNKNOWN_VALUES
         description_empty = not description
 
-        if name_unknown and artist_unknown:
-            return True
-        if name_unknown and description_empty:
-            return True
-        if artist_unknown and description_empty:
-            return True
-        return False
+        # Insufficient when any two of the three are missing
+        return name_unknown + artist_unknown + description_empty >= 2
 
     def _parse_vlm_json(self, content: str) -> Optional[dict]:
         if not content:
             return None
         cleaned = content.strip()
-        fence_match = re.search(
-            r"```(?:json)?\s*([\s\S]*?)\s*```",
-            cleaned,
-            re.IGNORECASE
-        )
-        if fence_match:
-            cleaned = fence_match.group(1).strip()
+        # Most responses are bare JSON, so try that before any scanning
         try:
-            return json.loads(cleaned)
-        except json.JSONDecodeError:
+            return orjson.loads(cleaned)
+        except orjson.JSONDecodeError:
             pass
-        brace_match = re.search(r"\{[\s\S]*\}", cleaned)
-        if brace_match:
+        fence_start = cleaned.find("```")
+        fence_end = -1
+        if fence_start != -1:
+            fence_end = cleaned.find("```", fence_start + 3)
+        if fence_end != -1:
+            cleaned = cleaned[fence_start + 3:fence_end]
+            if cleaned[:4].lower() == "json":
+                cleaned = cleaned[4:]
+            cleaned = cleaned.strip()
+            try:
+                return orjson.loads(cleaned)
+            except orjson.JSONDecodeError:
+                pass
+        brace_start = cleaned.find("{")
+        brace_end = cleaned.rfind("}")
+        if brace_start != -1 and brace_end > brace_start:
             try:
-                return json.loads(brace_match.group(0))
-            except json.JSONDecodeError:
+                return orjson.loads(cleaned[brace_start:brace_end + 1])
+            except orjson.JSONDecodeError:
                 return None
         return None
 
-    async def _vlm_recognition(self, image: Image.Image) -> dict:
+    async def _vlm_recognition(self, messages: list) -> dict:
         """
         Use Qwen-VL for real-time artwork recognition.
 
         Args:
-            image: PIL Image object
+            messages: Chat messages built by _build_messages
 
         Returns:
             dict with recognition results
         """
         try:
-            # Convert image to base64
-            image_base64 = encode_image_base64(image)
-
-            # Prepare messages for VLM
-            messages = [{
-                "role": "user",
-                "content": [
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/jpeg;base64,{image_base64}"
-                        }
-                    },
-                    {
-                        "type": "text",
-                        "text": """请分析这张艺术品图片，并以JSON格式返回以下信息：
-{
-    "name_cn": "艺术品中文名称",
-    "name_en": "艺术品英文名称（如果知道）",
-    "artist": "作者",
-    "year": "创作年代（如：1503-1519）",
-    "style": "艺术流派（如：文艺复兴、印象派等）",
-    "description": "简短描述（50字以内）"
-}
-
-如果无法识别为艺术品，请返回：
-{"error": "无法识别为艺术品"}
-
-只返回JSON，不要其他内容。"""
-                    }
-                ]
-            }]
-
             response = await self.modelscope.chat_completions(
                 model=config.VLM_MODEL,
                 messages=messages,
@@ -285,39 +393,8 @@ class ArtworkRecognitionService:
                 "error": f"VLM recognition error: {str(e)}"
             }
 
-    async def _kimi_recognition(self, image: Image.Image) -> dict:
+    async def _kimi_recognition(self, messages: list) -> dict:
         try:
-            image_base64 = encode_image_base64(image)
-
-            messages = [{
-                "role": "user",
-                "content": [
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/jpeg;base64,{image_base64}"
-                        }
-                    },
-                    {
-                        "type": "text",
-                        "text": """请分析这张艺术品图片，并以JSON格式返回以下信息：
-{
-    "name_cn": "艺术品中文名称",
-    "name_en": "艺术品英文名称（如果知道）",
-    "artist": "作者",
-    "year": "创作年代（如：1503-1519）",
-    "style": "艺术流派（如：文艺复兴、印象派等）",
-    "description": "简短描述（50字以内）"
-}
-
-如果无法识别为艺术品，请返回：
-{"error": "无法识别为艺术品"}
-
-只返回JSON，不要其他内容。"""
-                    }
-                ]
-            }]
-
             response = await self.modelscope.chat_completions(
                 model=config.KIMI_VLM_MODEL,
                 messages=messages,
@@ -3,70 +3,141 @@ Supabase client wrapper for Museum Guide MVP.
 Provides database operations and storage access.
 """
 
-from typing import Optional
-from supabase import create_client, Client
+import asyncio
+from typing import Optional, Union
+import httpx
+import numpy as np
+import orjson
+from supabase import create_client, Client, ClientOptions
 from config import config
+from utils.api_utils import async_ttl_cache
+
+
+def to_vector_literal(embedding: np.ndarray) -> str:
+    """Serialize an embedding as a pgvector literal at float32 precision."""
+    return orjson.dumps(
+        np.asarray(embedding, dtype=np.float32),
+        option=orjson.OPT_SERIALIZE_NUMPY
+    ).decode("utf-8")
 
 
 class SupabaseClient:
-    """Wrapper class for Supabase operations."""
+    """
+    Wrapper class for Supabase operations.
+
+    supabase-py is synchronous, so every request runs in a worker thread
+    to keep the event loop free. Storage existence checks are cached in
+    process for a few minutes; uploads through this client invalidate
+    the affected entries.
+    """
 
     def __init__(self):
         """Initialize Supabase client."""
+        # Database and storage calls share one pooled HTTP/2 connection
+        self.http_client = httpx.Client(
+            http2=True,
+            timeout=httpx.Timeout(120.0),
+            limits=httpx.Limits(max_keepalive_connections=16, max_connections=32)
+        )
         self.client: Client = create_client(
             config.SUPABASE_URL,
-            config.SUPABASE_KEY
+            config.SUPABASE_KEY,
+            options=ClientOptions(httpx_client=self.http_client)
         )
 
+    def close(self):
+        """Close the underlying HTTP connection pool."""
+        self.http_client.close()
+
     # ==================== Artwork Operations ====================
 
     async def get_artwork_by_id(self, artwork_id: str) -> Optional[dict]:
         """Get artwork by ID with hall information."""
-        response = self.client.table("artworks").select(
-            "*, halls(hall_name, floor, description)"
-        ).eq("id", artwork_id).single().execute()
+        response = await asyncio.to_thread(
+            self.client.table("artworks").select(
+                "*, halls(hall_name, floor, description)"
+            ).eq("id", artwork_id).single().execute
+        )
         return response.data if response.data else None
 
     async def search_artwork_by_vector(
         self,
-        embedding: list[float],
+        embedding: np.ndarray,
         threshold: float = 0.8,
         limit: int = 1
     ) -> list[dict]:
         """Search artwork using vector similarity."""
-        response = self.client.rpc(
-            "match_artwork",
-            {
-                "query_embedding": embedding,
-                "match_threshold": threshold,
-                "match_count": limit
-            }
-        ).execute()
+        response = await asyncio.to_thread(
+            self.client.rpc(
+                "match_artwork",
+                {
+                    "query_embedding": to_vector_literal(embedding),
+                    "match_threshold": threshold,
+                    "match_count": limit
+                }
+            ).execute
+        )
         return response.data if response.data else []
 
+    async def match_artwork_with_hall(
+        self,
+        embedding: np.ndarray,
+        threshold: float = 0.8
+    ) -> Optional[dict]:
+        """Find the closest artwork with its hall in one round trip."""
+        response = await asyncio.to_thread(
+            self.client.rpc(
+                "match_artwork_with_hall",
+                {
+                    "query_embedding": to_vector_literal(embedding),
+                    "match_threshold": threshold,
+                    "match_count": 1
+                }
+            ).execute
+        )
+        if not response.data:
+            return None
+
+        # Nest hall columns the way get_artwork_with_hall returns them
+        artwork = dict(response.data[0])
+        hall = {
+            "id": artwork.pop("hall_id"),
+            "hall_name": artwork.pop("hall_name"),
+            "floor": artwork.pop("hall_floor"),
+            "description": artwork.pop("hall_description")
+        }
+        artwork["halls"] = hall if hall["id"] else None
+        return artwork
+
     async def get_artwork_with_hall(self, artwork_id: str) -> Optional[dict]:
         """Get artwork with its hall information."""
-        response = self.client.table("artworks").select(
-            "id, name_cn, name_en, artist, year, style, image_url, "
-            "description_professional, description_casual, "
-            "halls(id, hall_name, floor, description)"
-        ).eq("id", artwork_id).single().execute()
+        response = await asyncio.to_thread(
+            self.client.table("artworks").select(
+                "id, name_cn, name_en, artist, year, style, image_url, "
+                "description_professional, description_casual, "
+                "halls(id, hall_name, floor, description)"
+            ).eq("id", artwork_id).single().execute
+        )
         return response.data if response.data else None
 
     # ==================== Hall Operations ====================
 
     async def get_hall_by_id(self, hall_id: str) -> Optional[dict]:
         """Get hall by ID."""
-        response = self.client.table("halls").select("*").eq(
-            "id", hall_id
-        ).single().execute()
+        response = await asyncio.to_thread(
+            self.client.table("halls").select("*").eq(
+                "id", hall_id
+            ).single().execute
+        )
         return response.data if response.data else None
 
     async def list_halls(self) -> list[dict]:
         """List all halls."""
-        response = self.client.table("halls").select("*").order(
-            "floor", desc=False
-        ).execute()
+        response = await asyncio.to_thread(
+            self.client.table("halls").select("*").order(
+                "floor", desc=False
+            ).execute
+        )
         return response.data if response.data else []
 
     # ==================== Audio Cache Operations ====================
@@ -78,9 +149,11 @@ class SupabaseClient:
     ) -> Optional[str]:
         """Get cached audio URL for artwork and style."""
         try:
-            response = self.client.table("audio_cache").select("audio_url").eq(
-                "artwork_id", artwork_id
-            ).eq("style", style).single().execute()
+            response = await asyncio.to_thread(
+                self.client.table("audio_cache").select("audio_url").eq(
+                    "artwork_id", artwork_id
+                ).eq("style", style).single().execute
+            )
             return response.data["audio_url"] if response.data else None
         except Exception as e:
             if "PGRST116" in str(e):
@@ -95,12 +168,14 @@ class SupabaseClient:
         audio_url: str
     ) -> dict:
         """Save audio cache record."""
-        response = self.client.table("audio_cache").insert({
-            "artwork_id": artwork_id,
-            "style": style,
-            "voice": voice,
-            "audio_url": audio_url
-        }).execute()
+        response = await asyncio.to_thread(
+            self.client.table("audio_cache").upsert({
+                "artwork_id": artwork_id,
+                "style": style,
+                "voice": voice,
+                "audio_url": audio_url
+            }, on_conflict="artwork_id,style").execute
+        )
         return response.data[0] if response.data else {}
 
     # ==================== Storage Operations ====================
@@ -108,13 +183,44 @@ class SupabaseClient:
     async def upload_audio(
         self,
         file_path: str,
-        file_data: bytes
+        file_data: Union[bytes, str]
     ) -> str:
-        """Upload audio file to Supabase Storage."""
+        """Upload audio bytes or a local audio file to Supabase Storage."""
         bucket = self.client.storage.from_(config.AUDIO_BUCKET)
-        bucket.upload(file_path, file_data, {"content-type": "audio/wav"})
+        await asyncio.to_thread(
+            bucket.upload,
+            file_path,
+            file_data,
+            {"content-type": "audio/wav", "x-upsert": "true"}
+        )
+        SupabaseClient.audio_exists.cache_invalidate(self, file_path)
         return bucket.get_public_url(file_path)
 
+    async def upload_recognition_image(
+        self,
+        file_path: str,
+        file_data: bytes
+    ) -> str:
+        """Upload a JPEG for recognition and return its public URL."""
+        bucket = self.client.storage.from_(config.RECOGNITION_IMAGE_BUCKET)
+        await asyncio.to_thread(
+            bucket.upload,
+            file_path,
+            file_data,
+            {"content-type": "image/jpeg", "x-upsert": "true"}
+        )
+        return bucket.get_public_url(file_path)
+
+    @async_ttl_cache()
+    async def audio_exists(self, file_path: str) -> bool:
+        """Check whether an audio file exists in Supabase Storage."""
+        folder, _, filename = file_path.rpartition("/")
+        bucket = self.client.storage.from_(config.AUDIO_BUCKET)
+        files = await asyncio.to_thread(
+            bucket.list, folder, {"search": filename}
+        )
+        return any(item.get("name") == filename for item in files or [])
+
     async def get_audio_url(self, file_path: str) -> str:
         """Get public URL for audio file."""
         bucket = self.client.storage.from_(config.AUDIO_BUCKET)
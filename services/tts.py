@@ -2,9 +2,16 @@
 Text-to-Speech service using ZhipuAI GLM-TTS API.
 Supports audio caching in Supabase Storage.
 """
-from typing import Optional, Tuple
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Optional, Tuple
 import httpx
+import orjson
 from config import config
+from utils.api_utils import SingleFlight
+from utils.audio_utils import create_temp_audio_file, remove_temp_audio_file
 from .supabase_client import get_supabase_client
 
 
@@ -16,10 +23,65 @@ class TTSService:
         "casual": "xiaochen"
     }
 
+    # Storage paths whose public URL is remembered in process
+    URL_CACHE_SIZE = 256
+
+    # A warm-up request should never hold up the caller for long
+    PREWARM_TIMEOUT = 5.0
+
     def __init__(self):
         """Initialize TTS service."""
         self.supabase = get_supabase_client()
         self.timeout = httpx.Timeout(60.0)
+        self.limits = httpx.Limits(
+            max_keepalive_connections=32,
+            max_connections=100
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._last_used = 0.0
+        self._inflight = SingleFlight()
+        # Storage paths are content-addressed, so their URLs never go stale
+        self._url_cache: OrderedDict[str, str] = OrderedDict()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the pooled HTTP/2 client bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                http2=True,
+                limits=self.limits
+            )
+            self._client_loop = loop
+        self._last_used = time.monotonic()
+        return self._client
+
+    async def aclose(self):
+        """Close the pooled HTTP client."""
+        client, loop = self._client, self._client_loop
+        self._client = None
+        self._client_loop = None
+        # Connections opened on an already closed loop cannot be shut down
+        if client is not None and loop is asyncio.get_running_loop():
+            await client.aclose()
+
+    async def prewarm(self):
+        """Open the TTS API connection ahead of the first synthesis call."""
+        if not config.ZHIPU_API_KEY:
+            return
+        # Skip while a recent request's connection is still kept alive
+        idle = time.monotonic() - self._last_used
+        warm = self._client_loop is asyncio.get_running_loop()
+        if warm and idle < self.limits.keepalive_expiry:
+            return
+        try:
+            await self._get_client().head(
+                config.ZHIPU_API_BASE.rstrip("/"),
+                timeout=self.PREWARM_TIMEOUT
+            )
+        except Exception as e:
+            print(f"TTS prewarm error: {e}")
 
     async def synthesize(
         self,
@@ -36,48 +98,79 @@ class TTSService:
             style: Voice style ("professional" or "casual")
 
         Returns:
-            dict with audio_url, audio_data or error
+            dict with audio_url, local audio_path or error
         """
+        voice = self.VOICE_MAP.get(style, "tongtong")
+        file_path = self._cache_path(text, voice, style)
+        # Identical narrations in flight share one synthesis and upload
+        return await self._inflight.run(
+            (file_path, artwork_id),
+            lambda: self._synthesize_cached(
+                text, artwork_id, style, voice, file_path
+            )
+        )
+
+    async def _synthesize_cached(
+        self,
+        text: str,
+        artwork_id: str,
+        style: str,
+        voice: str,
+        file_path: str
+    ) -> dict:
+        """Synthesize speech through the storage cache at file_path."""
+        audio_url = self._url_cache.get(file_path)
+        if audio_url:
+            self._url_cache.move_to_end(file_path)
+            return {
+                "success": True,
+                "source": "memory",
+                "audio_url": audio_url
+            }
+
         try:
-            # 1. Check cache first
-            cached_url = await self._get_cached_audio(artwork_id, style)
-            if cached_url:
-                cached_audio = await self._download_audio(cached_url)
-                if not cached_audio:
-                    return {
-                        "success": False,
-                        "error": "缓存音频下载失败"
-                    }
+            # 1. Check storage for audio of the same narration and voice
+            if await self.supabase.audio_exists(file_path):
+                audio_url = await self.supabase.get_audio_url(file_path)
+                self._remember_url(file_path, audio_url)
                 return {
                     "success": True,
                     "source": "cached",
-                    "audio_url": cached_url,
-                    "audio_data": cached_audio
+                    "audio_url": audio_url
                 }
 
-            # 2. Synthesize new audio
-            voice = self.VOICE_MAP.get(style, "tongtong")
-            audio_data, error = await self._call_sambert(text, voice)
+            # 2. Stream new audio into a playback file as it arrives
+            loop = asyncio.get_running_loop()
+            with create_temp_audio_file() as f:
+                audio_path = f.name
+                try:
+                    async for chunk in self._iter_audio(text, voice):
+                        await loop.run_in_executor(None, f.write, chunk)
+                    error = None if f.tell() else "TTS synthesis failed"
+                except Exception as e:
+                    error = str(e)
 
-            if not audio_data:
+            if error:
+                remove_temp_audio_file(audio_path)
                 return {
                     "success": False,
-                    "error": error or "TTS synthesis failed"
+                    "error": error
                 }
 
-            # 3. Upload to storage
-            audio_url = await self._upload_to_storage(
-                audio_data, artwork_id, style
+            # 3. Upload the file to storage
+            audio_url = await self.supabase.upload_audio(
+                file_path, audio_path
             )
 
             # 4. Save cache record
             await self._save_cache_record(artwork_id, style, voice, audio_url)
+            self._remember_url(file_path, audio_url)
 
             return {
                 "success": True,
                 "source": "generated",
                 "audio_url": audio_url,
-                "audio_data": audio_data
+                "audio_path": audio_path
             }
 
         except Exception as e:
@@ -105,6 +198,68 @@ class TTSService:
         audio_data, _ = await self._call_sambert(text, voice)
         return audio_data
 
+    async def synthesize_stream(
+        self,
+        text: str,
+        style: str = "professional"
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream synthesized speech without caching (for VLM results).
+
+        Args:
+            text: Text to synthesize
+            style: Voice style
+
+        Yields:
+            Audio byte chunks as they arrive
+
+        Raises:
+            Exception: On API or connection errors, including ones after
+                some chunks were already yielded
+        """
+        voice = self.VOICE_MAP.get(style, "tongtong")
+        async for chunk in self._iter_audio(text, voice):
+            yield chunk
+
+    async def _iter_audio(self, text: str, voice: str) -> AsyncIterator[bytes]:
+        """
+        Stream audio chunks from the GLM-TTS API.
+
+        Raises:
+            RuntimeError: If the API key is missing or the API returns an error
+        """
+        if not config.ZHIPU_API_KEY:
+            raise RuntimeError("缺少 ZHIPU_API_KEY")
+        url, headers, payload = self._build_request(text, voice)
+        async with self._get_client().stream(
+            "POST", url, headers=headers, content=orjson.dumps(payload)
+        ) as response:
+            content_type = response.headers.get("content-type", "")
+            if (
+                response.status_code >= 400
+                or "application/json" in content_type
+            ):
+                await response.aread()
+                raise RuntimeError(self._format_error(response))
+            async for chunk in response.aiter_bytes():
+                yield chunk
+
+    def _build_request(self, text: str, voice: str) -> Tuple[str, dict, dict]:
+        """Build URL, headers and payload for a GLM-TTS request."""
+        model = config.TTS_MODEL or "glm-tts"
+        payload = {
+            "model": model,
+            "input": text,
+            "voice": voice,
+            "response_format": "wav"
+        }
+        headers = {
+            "Authorization": f"Bearer {config.ZHIPU_API_KEY}",
+            "Content-Type": "application/json"
+        }
+        url = f"{config.ZHIPU_API_BASE.rstrip('/')}/audio/speech"
+        return url, headers, payload
+
     async def _call_sambert(
         self,
         text: str,
@@ -123,20 +278,10 @@ class TTSService:
         try:
             if not config.ZHIPU_API_KEY:
                 return None, "缺少 ZHIPU_API_KEY"
-            model = config.TTS_MODEL or "glm-tts"
-            payload = {
-                "model": model,
-                "input": text,
-                "voice": voice,
-                "response_format": "wav"
-            }
-            headers = {
-                "Authorization": f"Bearer {config.ZHIPU_API_KEY}",
-                "Content-Type": "application/json"
-            }
-            url = f"{config.ZHIPU_API_BASE.rstrip('/')}/audio/speech"
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(url, headers=headers, json=payload)
+            url, headers, payload = self._build_request(text, voice)
+            response = await self._get_client().post(
+                url, headers=headers, content=orjson.dumps(payload)
+            )
             if response.status_code >= 400:
                 return None, self._format_error(response)
             if "application/json" in response.headers.get("content-type", ""):
@@ -147,40 +292,21 @@ class TTSService:
             print(f"Sambert TTS error: {e}")
             return None, str(e)
 
-    async def _get_cached_audio(
-        self,
-        artwork_id: str,
-        style: str
-    ) -> Optional[str]:
-        """Get cached audio URL from database."""
-        return await self.supabase.get_cached_audio(artwork_id, style)
+    def _remember_url(self, file_path: str, audio_url: str):
+        """Record the public URL of a stored audio file, evicting the oldest."""
+        self._url_cache[file_path] = audio_url
+        self._url_cache.move_to_end(file_path)
+        while len(self._url_cache) > self.URL_CACHE_SIZE:
+            self._url_cache.popitem(last=False)
 
-    async def _upload_to_storage(
-        self,
-        audio_data: bytes,
-        artwork_id: str,
-        style: str
-    ) -> str:
-        """Upload audio to Supabase Storage."""
-        # Generate unique filename
-        filename = f"{artwork_id}_{style}.wav"
-        return await self.supabase.upload_audio(filename, audio_data)
-
-    async def _download_audio(self, audio_url: str) -> Optional[bytes]:
-        if not audio_url or not audio_url.startswith("http"):
-            return None
-        try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(audio_url)
-            if response.status_code >= 400:
-                return None
-            return response.content
-        except Exception:
-            return None
+    def _cache_path(self, text: str, voice: str, style: str) -> str:
+        """Build the storage path keyed by narration content and voice."""
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+        return f"{style}/{voice}-{key}.wav"
 
     def _format_error(self, response: httpx.Response) -> str:
         try:
-            data = response.json()
+            data = orjson.loads(response.content)
             if isinstance(data, dict):
                 error = data.get("error")
                 if isinstance(error, dict):
@@ -0,0 +1,12 @@
+-- ============================================
+-- 006: Allow audio cache upserts
+-- ============================================
+-- TTS audio is stored under a key derived from the narration text, so a
+-- changed narration replaces the existing artwork-style cache record.
+
+-- Audio cache: Allow update for authenticated service role
+CREATE POLICY "Allow service role update on audio_cache"
+ON audio_cache FOR UPDATE
+TO authenticated
+USING (true)
+WITH CHECK (true);
@@ -0,0 +1,54 @@
+-- ============================================
+-- 007: Store embeddings at half precision
+-- ============================================
+-- halfvec (pgvector >= 0.7.0) stores each dimension in 2 bytes, halving
+-- the size of the embedding column and its index.
+
+-- Rebuild the similarity index for the new column type
+DROP INDEX IF EXISTS idx_artworks_embedding;
+
+ALTER TABLE artworks
+ALTER COLUMN embedding TYPE halfvec(1536)
+USING embedding::halfvec(1536);
+
+CREATE INDEX IF NOT EXISTS idx_artworks_embedding
+ON artworks USING ivfflat (embedding halfvec_cosine_ops)
+WITH (lists = 100);
+
+-- Replace the search function to take a half precision query
+DROP FUNCTION IF EXISTS match_artwork(vector, float, int);
+
+CREATE OR REPLACE FUNCTION match_artwork(
+    query_embedding halfvec(1536),
+    match_threshold float DEFAULT 0.8,
+    match_count int DEFAULT 1
+)
+RETURNS TABLE (
+    id uuid,
+    name_cn text,
+    artist text,
+    hall_id uuid,
+    similarity float
+)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        artworks.id,
+        artworks.name_cn,
+        artworks.artist,
+        artworks.hall_id,
+        (1 - (artworks.embedding <=> query_embedding))::float as similarity
+    FROM artworks
+    WHERE artworks.embedding IS NOT NULL
+      AND (1 - (artworks.embedding <=> query_embedding)) > match_threshold
+    ORDER BY artworks.embedding <=> query_embedding
+    LIMIT match_count;
+END;
+$$;
+
+-- Add comment
+COMMENT ON FUNCTION match_artwork IS 'Find artworks by half precision vector similarity search';
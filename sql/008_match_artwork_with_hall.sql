@@ -0,0 +1,59 @@
+-- ============================================
+-- 008: Vector search with hall information
+-- ============================================
+-- Returns the best matches together with their hall, so recognition
+-- needs one round trip instead of match_artwork + get_artwork_with_hall.
+
+CREATE OR REPLACE FUNCTION match_artwork_with_hall(
+    query_embedding halfvec(1536),
+    match_threshold float DEFAULT 0.8,
+    match_count int DEFAULT 1
+)
+RETURNS TABLE (
+    id uuid,
+    name_cn text,
+    name_en text,
+    artist text,
+    year text,
+    style text,
+    image_url text,
+    description_professional text,
+    description_casual text,
+    hall_id uuid,
+    hall_name text,
+    hall_floor integer,
+    hall_description text,
+    similarity float
+)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        a.id,
+        a.name_cn,
+        a.name_en,
+        a.artist,
+        a.year,
+        a.style,
+        a.image_url,
+        a.description_professional,
+        a.description_casual,
+        h.id as hall_id,
+        h.hall_name,
+        h.floor as hall_floor,
+        h.description as hall_description,
+        (1 - (a.embedding <=> query_embedding))::float as similarity
+    FROM artworks a
+    LEFT JOIN halls h ON a.hall_id = h.id
+    WHERE a.embedding IS NOT NULL
+      AND (1 - (a.embedding <=> query_embedding)) > match_threshold
+    ORDER BY a.embedding <=> query_embedding
+    LIMIT match_count;
+END;
+$$;
+
+-- Add comment
+COMMENT ON FUNCTION match_artwork_with_hall IS 'Find artworks by vector similarity search with hall information';
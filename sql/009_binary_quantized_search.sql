@@ -0,0 +1,114 @@
+-- ============================================
+-- 009: Binary quantized coarse search with re-ranking
+-- ============================================
+-- binary_quantize (pgvector >= 0.7.0) keeps one bit per dimension, so the
+-- coarse index is 16x smaller than the halfvec column. Candidates found by
+-- Hamming distance (20 per requested match) are re-ranked with exact
+-- cosine similarity.
+
+CREATE INDEX IF NOT EXISTS idx_artworks_embedding_binary
+ON artworks USING hnsw ((binary_quantize(embedding)::bit(1536)) bit_hamming_ops);
+
+CREATE OR REPLACE FUNCTION match_artwork(
+    query_embedding halfvec(1536),
+    match_threshold float DEFAULT 0.8,
+    match_count int DEFAULT 1
+)
+RETURNS TABLE (
+    id uuid,
+    name_cn text,
+    artist text,
+    hall_id uuid,
+    similarity float
+)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    RETURN QUERY
+    WITH candidates AS (
+        SELECT artworks.id
+        FROM artworks
+        WHERE artworks.embedding IS NOT NULL
+        ORDER BY binary_quantize(artworks.embedding)::bit(1536)
+            <~> binary_quantize(query_embedding)
+        LIMIT match_count * 20
+    )
+    SELECT
+        a.id,
+        a.name_cn,
+        a.artist,
+        a.hall_id,
+        (1 - (a.embedding <=> query_embedding))::float as similarity
+    FROM candidates c
+    JOIN artworks a ON a.id = c.id
+    WHERE (1 - (a.embedding <=> query_embedding)) > match_threshold
+    ORDER BY a.embedding <=> query_embedding
+    LIMIT match_count;
+END;
+$$;
+
+COMMENT ON FUNCTION match_artwork IS 'Find artworks by binary quantized search with cosine re-ranking';
+
+
+CREATE OR REPLACE FUNCTION match_artwork_with_hall(
+    query_embedding halfvec(1536),
+    match_threshold float DEFAULT 0.8,
+    match_count int DEFAULT 1
+)
+RETURNS TABLE (
+    id uuid,
+    name_cn text,
+    name_en text,
+    artist text,
+    year text,
+    style text,
+    image_url text,
+    description_professional text,
+    description_casual text,
+    hall_id uuid,
+    hall_name text,
+    hall_floor integer,
+    hall_description text,
+    similarity float
+)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    RETURN QUERY
+    WITH candidates AS (
+        SELECT artworks.id
+        FROM artworks
+        WHERE artworks.embedding IS NOT NULL
+        ORDER BY binary_quantize(artworks.embedding)::bit(1536)
+            <~> binary_quantize(query_embedding)
+        LIMIT match_count * 20
+    )
+    SELECT
+        a.id,
+        a.name_cn,
+        a.name_en,
+        a.artist,
+        a.year,
+        a.style,
+        a.image_url,
+        a.description_professional,
+        a.description_casual,
+        h.id as hall_id,
+        h.hall_name,
+        h.floor as hall_floor,
+        h.description as hall_description,
+        (1 - (a.embedding <=> query_embedding))::float as similarity
+    FROM candidates c
+    JOIN artworks a ON a.id = c.id
+    LEFT JOIN halls h ON a.hall_id = h.id
+    WHERE (1 - (a.embedding <=> query_embedding)) > match_threshold
+    ORDER BY a.embedding <=> query_embedding
+    LIMIT match_count;
+END;
+$$;
+
+COMMENT ON FUNCTION match_artwork_with_hall IS 'Find artworks with hall information by binary quantized search with cosine re-ranking';
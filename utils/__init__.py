@@ -2,12 +2,38 @@
 Utility functions for Museum Guide MVP.
 """
 
-from .image_utils import preprocess_image, encode_image_base64
-from .api_utils import async_retry, handle_api_error
+from .image_utils import (
+    preprocess_image,
+    preprocess_image_async,
+    encode_image_base64,
+    encode_image_base64_async,
+)
+from .api_utils import (
+    async_retry,
+    async_ttl_cache,
+    handle_api_error,
+    MicroBatcher,
+    SingleFlight,
+)
+from .audio_utils import (
+    WavConcatenator,
+    create_temp_audio_file,
+    get_audio_temp_dir,
+    remove_temp_audio_file,
+)
 
 __all__ = [
     "preprocess_image",
+    "preprocess_image_async",
     "encode_image_base64",
+    "encode_image_base64_async",
     "async_retry",
+    "async_ttl_cache",
     "handle_api_error",
+    "MicroBatcher",
+    "SingleFlight",
+    "WavConcatenator",
+    "create_temp_audio_file",
+    "get_audio_temp_dir",
+    "remove_temp_audio_file",
 ]
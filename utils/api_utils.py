@@ -4,7 +4,11 @@ API utility functions for Museum Guide MVP.
 
 import asyncio
 import functools
-from typing import TypeVar, Callable, Any
+import random
+import time
+import weakref
+from collections import OrderedDict
+from typing import TypeVar, Callable, Any, Awaitable, Hashable, Optional
 
 T = TypeVar('T')
 
@@ -13,7 +17,10 @@ def async_retry(
     max_retries: int = 3,
     delay: float = 1.0,
     backoff: float = 2.0,
-    exceptions: tuple = (Exception,)
+    exceptions: tuple = (Exception,),
+    max_delay: float = 30.0,
+    jitter: bool = True,
+    is_retryable: Optional[Callable[[Exception], bool]] = None
 ) -> Callable:
     """
     Decorator for retrying async functions.
@@ -23,6 +30,11 @@ def async_retry(
         delay: Initial delay between retries in seconds
         backoff: Multiplier for delay after each retry
         exceptions: Tuple of exceptions to catch
+        max_delay: Upper bound on the delay between retries in seconds
+        jitter: Scale each delay by a random factor in [0.5, 1.5) so that
+            concurrent callers do not retry in lockstep
+        is_retryable: Optional predicate; exceptions it rejects are raised
+            immediately, e.g. 4xx client errors
 
     Returns:
         Decorated function
@@ -31,19 +43,67 @@ def async_retry(
         @functools.wraps(func)
         async def wrapper(*args, **kwargs):
             current_delay = delay
-            last_exception = None
 
             for attempt in range(max_retries + 1):
                 try:
                     return await func(*args, **kwargs)
                 except exceptions as e:
-                    last_exception = e
-                    if attempt < max_retries:
-                        await asyncio.sleep(current_delay)
-                        current_delay *= backoff
+                    if attempt == max_retries:
+                        raise
+                    if is_retryable is not None and not is_retryable(e):
+                        raise
+                    sleep_for = min(max_delay, current_delay)
+                    if jitter:
+                        sleep_for *= random.uniform(0.5, 1.5)
+                    await asyncio.sleep(sleep_for)
+                    current_delay *= backoff
 
-            raise last_exception
+        return wrapper
+    return decorator
+
+
+def async_ttl_cache(maxsize: int = 1024, ttl: float = 300.0) -> Callable:
+    """
+    Decorator caching async function results in a TTL-bounded LRU.
+
+    Results are keyed by the call arguments, so positional and keyword
+    forms of the same call are cached separately. Exceptions are not
+    cached.
+
+    Args:
+        maxsize: Maximum number of cached results
+        ttl: Seconds a cached result stays valid
+
+    Returns:
+        Decorated function with cache_invalidate(*args, **kwargs) and
+        cache_clear() attributes
+    """
+    def decorator(func: Callable) -> Callable:
+        cache: OrderedDict = OrderedDict()
+
+        def make_key(args: tuple, kwargs: dict) -> tuple:
+            return args + tuple(sorted(kwargs.items()))
 
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = make_key(args, kwargs)
+            entry = cache.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                cache.move_to_end(key)
+                return entry[1]
+
+            result = await func(*args, **kwargs)
+            cache[key] = (time.monotonic() + ttl, result)
+            cache.move_to_end(key)
+            while len(cache) > maxsize:
+                cache.popitem(last=False)
+            return result
+
+        def cache_invalidate(*args, **kwargs):
+            cache.pop(make_key(args, kwargs), None)
+
+        wrapper.cache_invalidate = cache_invalidate
+        wrapper.cache_clear = cache.clear
         return wrapper
     return decorator
 
@@ -87,10 +147,132 @@ class RateLimiter:
     async def acquire(self):
         """Wait if necessary to respect rate limit."""
         async with self._lock:
-            current = asyncio.get_event_loop().time()
+            current = time.monotonic()
             elapsed = current - self.last_call
 
             if elapsed < self.min_interval:
                 await asyncio.sleep(self.min_interval - elapsed)
 
-            self.last_call = asyncio.get_event_loop().time()
+            self.last_call = time.monotonic()
+
+
+class _BatchState:
+    """Pending items and flush timer of a MicroBatcher on one event loop."""
+
+    __slots__ = ("pending", "timer", "__weakref__")
+
+    def __init__(self):
+        self.pending: list[tuple[Any, asyncio.Future]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class MicroBatcher:
+    """Group calls that arrive within a short window into one batched call.
+
+    Futures and timers belong to a single event loop, so batching state is
+    kept per loop; items submitted from different loops never share a batch.
+    """
+
+    def __init__(
+        self,
+        func: Callable[[list], Awaitable[list]],
+        max_batch_size: int = 32,
+        max_wait: float = 0.01
+    ):
+        """
+        Initialize batcher.
+
+        Args:
+            func: Coroutine function mapping a list of items to a list of
+                results in the same order
+            max_batch_size: Items that trigger an immediate dispatch
+            max_wait: Seconds to wait for more items after the first one
+        """
+        self._func = func
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._states: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        # Strong references so dispatched batches are not garbage collected
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Add an item to the next batch and wait for its result.
+
+        Args:
+            item: Single input for func
+
+        Returns:
+            Result for the item
+
+        Raises:
+            Exception: Whatever func raised for the batch
+        """
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            state = self._states[loop] = _BatchState()
+        future = loop.create_future()
+        state.pending.append((item, future))
+        if len(state.pending) >= self.max_batch_size:
+            self._flush(loop, state)
+        elif state.timer is None:
+            state.timer = loop.call_later(self.max_wait, self._flush, loop, state)
+        return await future
+
+    def _flush(self, loop: asyncio.AbstractEventLoop, state: _BatchState):
+        if state.timer is not None:
+            state.timer.cancel()
+            state.timer = None
+        batch, state.pending = state.pending, []
+        if batch:
+            task = loop.create_task(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: list[tuple[Any, asyncio.Future]]):
+        try:
+            results = await self._func([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"Batch returned {len(results)} results for {len(batch)} items"
+                )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution."""
+
+    def __init__(self):
+        """Initialize the in-flight call table."""
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await func(), or join the call already running for the same key.
+
+        The shared call is shielded, so one caller being cancelled does not
+        cancel it for the others.
+
+        Args:
+            key: Identity of the call
+            func: Zero-argument coroutine function to run
+
+        Returns:
+            Result of the shared call
+        """
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._inflight[key] = future
+            future.add_done_callback(
+                lambda _: self._inflight.pop(key, None)
+            )
+        return await asyncio.shield(future)
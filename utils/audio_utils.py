@@ -0,0 +1,125 @@
+"""
+Audio processing utilities for Museum Guide MVP.
+"""
+
+import atexit
+import io
+import os
+import shutil
+import tempfile
+import wave
+from typing import IO, Optional
+
+# Playback files live in RAM-backed /dev/shm when the host provides it
+AUDIO_TEMP_BASE = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+# Gradio copies returned files into its own cache, so only the most
+# recent playback files need to be kept around
+MAX_TEMP_AUDIO_FILES = 32
+
+_temp_audio_files: dict[str, None] = {}
+_audio_temp_dir: Optional[str] = None
+
+
+def get_audio_temp_dir() -> str:
+    """
+    Get the private directory holding playback files.
+
+    The directory is created on first use and only ever contains files
+    from create_temp_audio_file, so it is safe to expose to Gradio.
+
+    Returns:
+        Absolute directory path
+    """
+    global _audio_temp_dir
+    if _audio_temp_dir is None:
+        _audio_temp_dir = tempfile.mkdtemp(
+            prefix="museum-audio-", dir=AUDIO_TEMP_BASE
+        )
+    return _audio_temp_dir
+
+
+def create_temp_audio_file(suffix: str = ".wav") -> IO[bytes]:
+    """
+    Create a playback file that is removed automatically.
+
+    The oldest files are removed once more than MAX_TEMP_AUDIO_FILES
+    exist, and any remaining ones when the process exits.
+
+    Args:
+        suffix: File name suffix
+
+    Returns:
+        Open binary file object; the caller closes it
+    """
+    f = tempfile.NamedTemporaryFile(
+        prefix="museum-",
+        suffix=suffix,
+        dir=get_audio_temp_dir(),
+        delete=False
+    )
+    _temp_audio_files[f.name] = None
+    while len(_temp_audio_files) > MAX_TEMP_AUDIO_FILES:
+        remove_temp_audio_file(next(iter(_temp_audio_files)))
+    return f
+
+
+def remove_temp_audio_file(path: str):
+    """Remove a playback file created by create_temp_audio_file."""
+    _temp_audio_files.pop(path, None)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+@atexit.register
+def _remove_all_temp_audio_files():
+    for path in list(_temp_audio_files):
+        remove_temp_audio_file(path)
+    if _audio_temp_dir is not None:
+        shutil.rmtree(_audio_temp_dir, ignore_errors=True)
+
+
+class WavConcatenator:
+    """Append WAV clips with the same format to a single WAV file."""
+
+    def __init__(self, path: str):
+        """
+        Initialize concatenator.
+
+        Args:
+            path: Output WAV file path
+        """
+        self.path = path
+        self._writer: Optional[wave.Wave_write] = None
+        self._params = None
+
+    def append(self, audio_data: bytes):
+        """
+        Append the frames of a WAV clip to the output file.
+
+        Args:
+            audio_data: Complete WAV file bytes
+
+        Raises:
+            wave.Error: If the clip cannot be parsed or its format differs
+            EOFError: If the clip is too short or its header is truncated
+        """
+        with wave.open(io.BytesIO(audio_data), "rb") as clip:
+            params = clip.getparams()[:3]
+            if self._writer is None:
+                self._writer = wave.open(self.path, "wb")
+                self._writer.setnchannels(params[0])
+                self._writer.setsampwidth(params[1])
+                self._writer.setframerate(params[2])
+                self._params = params
+            elif params != self._params:
+                raise wave.Error(f"Mismatched WAV format: {params}")
+            self._writer.writeframes(clip.readframes(clip.getnframes()))
+
+    def close(self):
+        """Finalize the WAV header and close the output file."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
@@ -2,11 +2,25 @@
 Image processing utilities for Museum Guide MVP.
 """
 
+import asyncio
 import base64
 import io
-from typing import Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, Union
+import numpy as np
 from PIL import Image
 
+try:
+    # Optional: OpenCV's INTER_AREA is much faster for large downscales
+    import cv2
+except ImportError:
+    cv2 = None
+
+# Dedicated pool so image work does not starve the default executor
+_image_executor = ThreadPoolExecutor(
+    max_workers=4, thread_name_prefix="image"
+)
+
 
 def preprocess_image(
     image: Image.Image,
@@ -27,28 +41,63 @@ def preprocess_image(
         image = image.convert("RGB")
 
     # Resize while maintaining aspect ratio
-    image.thumbnail(max_size, Image.Resampling.LANCZOS)
-
-    return image
-
-
-def encode_image_base64(image: Image.Image, format: str = "JPEG") -> str:
+    if cv2 is None:
+        image.thumbnail(max_size, Image.Resampling.LANCZOS)
+        return image
+
+    width, height = image.size
+    scale = min(max_size[0] / width, max_size[1] / height)
+    if scale >= 1.0:
+        return image
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    resized = cv2.resize(
+        np.asarray(image), size, interpolation=cv2.INTER_AREA
+    )
+    return Image.fromarray(resized)
+
+
+def encode_image_base64(
+    image: Union[Image.Image, bytes],
+    format: str = "JPEG"
+) -> str:
     """
     Encode PIL Image to base64 string.
 
     Args:
-        image: PIL Image object
+        image: PIL Image object, or image bytes that are already encoded
         format: Image format (JPEG, PNG, etc.)
 
     Returns:
         Base64 encoded string
     """
+    if isinstance(image, bytes):
+        return base64.b64encode(image).decode("utf-8")
     buffer = io.BytesIO()
     image.save(buffer, format=format, quality=85)
     buffer.seek(0)
     return base64.b64encode(buffer.getvalue()).decode("utf-8")
 
 
+async def preprocess_image_async(
+    image: Image.Image,
+    max_size: Tuple[int, int] = (512, 512)
+) -> Image.Image:
+    """Run preprocess_image in the image thread pool."""
+    return await asyncio.get_running_loop().run_in_executor(
+        _image_executor, preprocess_image, image, max_size
+    )
+
+
+async def encode_image_base64_async(
+    image: Union[Image.Image, bytes],
+    format: str = "JPEG"
+) -> str:
+    """Run encode_image_base64 in the image thread pool."""
+    return await asyncio.get_running_loop().run_in_executor(
+        _image_executor, encode_image_base64, image, format
+    )
+
+
 def decode_image_base64(base64_string: str) -> Image.Image:
     """
     Decode base64 string to PIL Image.
@@ -91,3 +140,13 @@ def image_to_bytes(image: Image.Image, format: str = "JPEG") -> bytes:
     image.save(buffer, format=format, quality=85)
     buffer.seek(0)
     return buffer.getvalue()
+
+
+async def image_to_bytes_async(
+    image: Image.Image,
+    format: str = "JPEG"
+) -> bytes:
+    """Run image_to_bytes in the image thread pool."""
+    return await asyncio.get_running_loop().run_in_executor(
+        _image_executor, image_to_bytes, image, format
+    )